@@ -1,23 +1,109 @@
+import asyncio
+import functools
+import hashlib
 import os
 import random
-import string
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import List, Optional, Literal
+from typing import Optional, Literal
 
-from fastapi import FastAPI, UploadFile, File, Form
+import cachetools
+import msgspec
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel, Field
 
 from database import db
 
-app = FastAPI(title="AI Mock Interview API")
+# Response writes are buffered and flushed in batches so the answer
+# endpoint returns after a queue put instead of a Mongo round trip.
+_RESP_BATCH_SIZE = 100
+_RESP_FLUSH_SECONDS = 0.1
+
+
+async def _response_flusher(queue: "asyncio.Queue[dict]"):
+    loop = asyncio.get_running_loop()
+    batch = []
+    stop = False
+    try:
+        while not stop:
+            item = await queue.get()
+            if item is None:  # shutdown sentinel
+                break
+            batch = [item]
+            deadline = loop.time() + _RESP_FLUSH_SECONDS
+            while len(batch) < _RESP_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                await db["response"].insert_many(batch, ordered=False)
+            except Exception:
+                # Feedback records are best-effort; keep the flusher alive.
+                pass
+            batch = []
+    finally:
+        # Flush the in-hand batch plus anything still queued so shutdown
+        # (or an unexpected cancellation) drops no unwritten records.
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is not None:
+                batch.append(item)
+        if batch:
+            try:
+                await asyncio.shield(db["response"].insert_many(batch, ordered=False))
+            except Exception:
+                pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.resp_q = asyncio.Queue()
+    flusher = asyncio.create_task(_response_flusher(app.state.resp_q)) if db is not None else None
+    yield
+    if flusher is not None:
+        # A sentinel rather than cancel(): cancellation racing a completed
+        # queue.get inside wait_for can be swallowed, leaving the task
+        # running and this await hanging.
+        app.state.resp_q.put_nowait(None)
+        try:
+            await flusher
+        except asyncio.CancelledError:
+            pass
+
+
+app = FastAPI(title="AI Mock Interview API", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Compress larger bodies; the threshold sits below the report/summary
+# payload sizes so those actually gzip, while tiny constant responses
+# (root, healthz, pricing) skip compression.
+app.add_middleware(GZipMiddleware, minimum_size=100, compresslevel=5)
+
+# Explicit origin/method/header lists keep CORSMiddleware on its fast
+# path, and max_age lets browsers cache preflights for a day.
+_ALLOWED_ORIGINS = [
+    o.strip() for o in os.getenv("FRONTEND_URL", "http://localhost:3000").split(",") if o.strip()
+]
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=_ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["content-type", "authorization"],
+    max_age=86400,
 )
 
 
@@ -31,13 +117,22 @@ class SessionCreate(BaseModel):
     resume_text: Optional[str] = None
 
 
-class TextAnswer(BaseModel):
+class TextAnswer(msgspec.Struct):
+    # msgspec decodes the raw body straight into the struct in one C
+    # pass, skipping the json-to-dict-to-model detour Pydantic takes.
     session_id: str
     question_id: str
     answer: str
 
 
+_decode_text_answer = msgspec.json.Decoder(TextAnswer).decode
+
+
 # ---------------------------- Utilities ---------------------------
+# Module-private RNG: avoids sharing the global random state (and its
+# implicit locking) with anything else in the process.
+_rng = random.Random()
+
 QUESTIONS_BANK = {
     "Easy": [
         ("Explain the difference between HTTP and HTTPS.", "HTTPS is HTTP over TLS providing encryption, integrity, and authentication."),
@@ -54,20 +149,53 @@ QUESTIONS_BANK = {
 }
 
 
+# The bank is flattened once at import into parallel columns (questions,
+# answers, levels) with per-level index ranges, so _pick_question draws
+# one index and reads three columns — no tuple unpacking per call, and
+# the columns are ready for bulk scoring over a much larger bank.
+_QS: tuple = ()
+_AS: tuple = ()
+_LEVELS: tuple = ()
+_LEVEL_RANGE = {}
+
+
+def _build_question_columns():
+    global _QS, _AS, _LEVELS
+    qs, answers, levels = [], [], []
+    for level in ("Easy", "Intermediate", "Advanced"):
+        start = len(qs)
+        for q, a in QUESTIONS_BANK[level]:
+            qs.append(q)
+            answers.append(a)
+            levels.append(level)
+        _LEVEL_RANGE[level] = (start, len(qs))
+    _LEVEL_RANGE["Mixed"] = (0, len(qs))
+    _QS, _AS, _LEVELS = tuple(qs), tuple(answers), tuple(levels)
+
+
+_build_question_columns()
+
+_FALLBACK_QUESTION = (
+    "Tell me about yourself.",
+    "Give a concise summary of your background, achievements, and goals.",
+    "Mixed",
+)
+
+
 def _make_id(prefix: str = "sess") -> str:
-    return f"{prefix}_" + ''.join(random.choices(string.ascii_lowercase + string.digits, k=10))
+    # One urandom syscall + C-level hex encode; 56 bits of entropy,
+    # above the ~52 bits of the old 10-char base-36 suffix.
+    return f"{prefix}_{os.urandom(7).hex()}"
 
 
 def _pick_question(difficulty: str):
-    pool: List = []
-    if difficulty == "Mixed":
-        for k in ("Easy", "Intermediate", "Advanced"):
-            pool.extend([(q, a, k) for q, a in QUESTIONS_BANK[k]])
+    bounds = _LEVEL_RANGE.get(difficulty)
+    if bounds is None or bounds[0] == bounds[1]:
+        # Unknown level, or a level whose bank list is empty.
+        q, a, level = _FALLBACK_QUESTION
     else:
-        pool = [(q, a, difficulty) for q, a in QUESTIONS_BANK.get(difficulty, [])]
-    if not pool:
-        pool = [("Tell me about yourself.", "Give a concise summary of your background, achievements, and goals." , difficulty)]
-    q, a, level = random.choice(pool)
+        idx = _rng.randrange(bounds[0], bounds[1])
+        q, a, level = _QS[idx], _AS[idx], _LEVELS[idx]
     return {
         "id": _make_id("q"),
         "text": q,
@@ -76,34 +204,73 @@ def _pick_question(difficulty: str):
     }
 
 
+# Static payloads serialized once at import; these routes return constants.
+_PRICING_BYTES = orjson.dumps({
+    "text": {"price": 49, "currency": "INR", "label": "Text Interview"},
+    "voice": {"price": 119, "currency": "INR", "label": "Voice Interview"},
+    "bundle_note": "4 rounds + instant feedback",
+})
+
+_SUMMARY_BYTES = orjson.dumps({
+    "score": 76,
+    "strengths": ["Clear structure", "Good examples"],
+    "mistakes": ["Missed edge cases", "Overlong intro"],
+    "tips": ["Use STAR format", "Quantify impact", "Conclude crisply"],
+})
+
+_REPORT_BYTES = orjson.dumps({
+    "categories": {
+        "Technical": 78,
+        "Coding": 72,
+        "Logical": 80,
+        "HR": 70,
+        "Communication": 82,
+    },
+    "plan": [
+        "Day 1-2: Review data structures",
+        "Day 3-4: Mock interviews (2/day)",
+        "Day 5: Behavioral answers",
+        "Day 6: System design drills",
+        "Day 7: Full-length simulation",
+    ],
+    "overall": 76,
+})
+
+
 # ----------------------------- Routes -----------------------------
+# Single prebuilt Response reused for every hit; Starlette writes its
+# cached raw_headers directly, so the liveness path allocates nothing.
+_ROOT_RESPONSE = Response(
+    content=b'{"message":"AI Mock Interview Backend running"}',
+    media_type="application/json",
+)
+
+
 @app.get("/")
-def root():
-    return {"message": "AI Mock Interview Backend running"}
+async def root():
+    return _ROOT_RESPONSE
 
 
 @app.get("/api/pricing")
-def pricing():
-    return {
-        "text": {"price": 49, "currency": "INR", "label": "Text Interview"},
-        "voice": {"price": 119, "currency": "INR", "label": "Voice Interview"},
-        "bundle_note": "4 rounds + instant feedback"
-    }
+async def pricing():
+    return Response(content=_PRICING_BYTES, media_type="application/json")
 
 
 @app.post("/api/resume/extract")
 async def extract_resume(file: UploadFile = File(...)):
-    content = await file.read()
-    text_preview = content[:200].decode(errors="ignore") if content else ""
+    # Only the preview is needed, so read just those bytes instead of
+    # materializing the whole upload in memory.
+    chunk = await file.read(200)
+    text_preview = chunk.decode(errors="ignore") if chunk else ""
+    await file.close()
     skills = ["Python", "APIs", "React", "System Design"]
     return {"status": "ok", "skills": skills, "preview": text_preview}
 
 
 @app.post("/api/session")
-def create_session(payload: SessionCreate):
+async def create_session(payload: SessionCreate):
     session_id = _make_id()
     doc = {
-        "_id": session_id,
         "mode": payload.mode,
         "job_role": payload.job_role,
         "experience": payload.experience,
@@ -112,18 +279,50 @@ def create_session(payload: SessionCreate):
         "resume_text": payload.resume_text,
         "paid": True,  # mock as paid after UI payment step
         "progress": {"current": 0, "total": 5},
-        "created_at": datetime.now(timezone.utc),
-        "updated_at": datetime.now(timezone.utc),
     }
+    _SESSION_CACHE[session_id] = {"_id": session_id, **doc}
     if db is None:
         # Allow app to run even if DB not configured
         return {"session_id": session_id, "progress": doc["progress"]}
-    db["session"].insert_one(doc)
+    # Upsert so Mongo stamps created_at/updated_at server-side; avoids
+    # clock skew between workers and a datetime allocation per insert.
+    await db["session"].update_one(
+        {"_id": session_id},
+        {"$setOnInsert": doc, "$currentDate": {"created_at": True, "updated_at": True}},
+        upsert=True,
+    )
     return {"session_id": session_id, "progress": doc["progress"]}
 
 
+# Per-process session cache so follow-up requests skip the Mongo round
+# trip; writers update the cached doc in place (write-through) and TTL
+# bounds staleness across workers.
+_SESSION_CACHE = cachetools.TTLCache(maxsize=50_000, ttl=300)
+_DEFAULT_PROGRESS = {"current": 0, "total": 5}
+
+
+async def _get_session(session_id: str) -> dict:
+    doc = _SESSION_CACHE.get(session_id)
+    if doc is None:
+        if db is not None:
+            doc = await db["session"].find_one({"_id": session_id})
+        if doc is None:
+            # Unknown session (or no DB): track state in-process only.
+            doc = {"_id": session_id, "progress": dict(_DEFAULT_PROGRESS)}
+        _SESSION_CACHE[session_id] = doc
+    return doc
+
+
+async def _get_progress(session_id: str) -> dict:
+    session = await _get_session(session_id)
+    progress = session.get("progress")
+    if progress is None:
+        progress = session["progress"] = dict(_DEFAULT_PROGRESS)
+    return progress
+
+
 @app.get("/api/text/question")
-def get_text_question(session_id: str, difficulty: Optional[str] = None):
+async def get_text_question(session_id: str, difficulty: Optional[str] = None):
     q = _pick_question(difficulty or "Mixed")
     return {
         "question": {
@@ -131,37 +330,72 @@ def get_text_question(session_id: str, difficulty: Optional[str] = None):
             "text": q["text"],
             "difficulty": q["difficulty"],
         },
-        "progress": {"current": random.randint(1, 5), "total": 5}
+        "progress": await _get_progress(session_id),
     }
 
 
-@app.post("/api/text/answer")
-def submit_text_answer(payload: TextAnswer):
-    # rudimentary scoring
-    answer_len = len(payload.answer.strip())
+def _answer_hash(answer: str) -> str:
+    return hashlib.blake2b(answer.strip().lower().encode(), digest_size=16).hexdigest()
+
+
+@functools.lru_cache(maxsize=4096)
+def _score_answer(question_id: str, answer_hash: str, answer_len: int) -> dict:
+    # Rudimentary scoring today; memoized by (question, normalized answer)
+    # so swapping in real LLM grading later gets repeat answers for free.
     content_score = max(30, min(100, answer_len // 5 + 40))
     correct = content_score > 60
-    feedback = {
+    return {
         "correct": correct,
         "grammar_fixes": "Capitalize proper nouns. Keep sentences concise.",
         "content_score": content_score,
         "correct_answer": "Sample ideal answer with structured points and examples.",
         "next_available": True,
     }
+
+
+@app.post("/api/text/answer")
+async def submit_text_answer(request: Request):
+    try:
+        payload = _decode_text_answer(await request.body())
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    feedback = _score_answer(
+        payload.question_id,
+        _answer_hash(payload.answer),
+        len(payload.answer.strip()),
+    )
+    progress = await _get_progress(payload.session_id)
+    if progress["current"] < progress["total"]:
+        progress["current"] += 1
     if db is not None:
-        db["response"].insert_one({
+        app.state.resp_q.put_nowait({
             "session_id": payload.session_id,
             "question_id": payload.question_id,
             "answer": payload.answer,
             "feedback": feedback,
             "created_at": datetime.now(timezone.utc),
         })
+        await db["session"].update_one(
+            {"_id": payload.session_id},
+            {"$set": {"progress": progress}, "$currentDate": {"updated_at": True}},
+        )
     return feedback
 
 
-@app.post("/api/voice/answer")
+_MAX_AUDIO_BYTES = 10 * 1024 * 1024
+
+
+async def _check_upload_size(request: Request):
+    # Reject oversized bodies before Starlette spools them to disk.
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > _MAX_AUDIO_BYTES:
+        raise HTTPException(status_code=413, detail="Audio upload exceeds 10 MB limit")
+
+
+@app.post("/api/voice/answer", dependencies=[Depends(_check_upload_size)])
 async def submit_voice_answer(session_id: str = Form(...), question_id: str = Form(...), audio: UploadFile = File(...)):
-    # mock analysis
+    # mock analysis; when real analysis lands, stream chunks via
+    # `async for chunk in audio` rather than reading the whole body
     return {
         "tone": 78,
         "clarity": 82,
@@ -172,35 +406,13 @@ async def submit_voice_answer(session_id: str = Form(...), question_id: str = Fo
 
 
 @app.get("/api/summary")
-def round_summary(session_id: str):
-    strengths = ["Clear structure", "Good examples"]
-    mistakes = ["Missed edge cases", "Overlong intro"]
-    tips = ["Use STAR format", "Quantify impact", "Conclude crisply"]
-    return {
-        "score": 76,
-        "strengths": strengths,
-        "mistakes": mistakes,
-        "tips": tips,
-    }
+async def round_summary(session_id: str):
+    return Response(content=_SUMMARY_BYTES, media_type="application/json")
 
 
 @app.get("/api/report")
-def final_report(session_id: str):
-    categories = {
-        "Technical": 78,
-        "Coding": 72,
-        "Logical": 80,
-        "HR": 70,
-        "Communication": 82,
-    }
-    plan = [
-        "Day 1-2: Review data structures",
-        "Day 3-4: Mock interviews (2/day)",
-        "Day 5: Behavioral answers",
-        "Day 6: System design drills",
-        "Day 7: Full-length simulation",
-    ]
-    return {"categories": categories, "plan": plan, "overall": 76}
+async def final_report(session_id: str):
+    return Response(content=_REPORT_BYTES, media_type="application/json")
 
 
 @app.post("/api/payment/initiate")
@@ -208,8 +420,50 @@ async def payment_initiate(amount: int = Form(...), mode: str = Form(...)):
     return {"status": "success", "transaction_id": _make_id("pay"), "amount": amount, "mode": mode}
 
 
+# Probe results are cached briefly so orchestrator polling of /test and
+# /readyz does not bill Mongo an admin round trip every few seconds.
+_PROBE_TTL_SECONDS = 5.0
+_db_probe = {"checked_at": 0.0, "ok": False, "error": "", "collections": []}
+
+
+async def _probe_database() -> dict:
+    now = time.monotonic()
+    if now - _db_probe["checked_at"] > _PROBE_TTL_SECONDS:
+        try:
+            await db.command("ping")
+            _db_probe["collections"] = (await db.list_collection_names())[:10]
+            _db_probe["ok"] = True
+            _db_probe["error"] = ""
+        except Exception as e:
+            _db_probe["ok"] = False
+            _db_probe["error"] = str(e)[:50]
+            _db_probe["collections"] = []
+        _db_probe["checked_at"] = now
+    return _db_probe
+
+
+_HEALTHZ = b'{"status":"ok"}'
+
+
+@app.get("/healthz")
+async def healthz():
+    # Liveness: process-only, zero I/O.
+    return Response(content=_HEALTHZ, media_type="application/json")
+
+
+@app.get("/readyz")
+async def readyz():
+    # Readiness: cached DB probe; apps without a DB are always ready.
+    if db is None:
+        return {"status": "ready", "database": "not configured"}
+    probe = await _probe_database()
+    if probe["ok"]:
+        return {"status": "ready", "database": "connected"}
+    return ORJSONResponse({"status": "not ready", "database": probe["error"]}, status_code=503)
+
+
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -225,12 +479,12 @@ def test_database():
             response["database_url"] = "✅ Configured"
             response["database_name"] = db.name if hasattr(db, 'name') else "✅ Connected"
             response["connection_status"] = "Connected"
-            try:
-                collections = db.list_collection_names()
-                response["collections"] = collections[:10]
+            probe = await _probe_database()
+            if probe["ok"]:
+                response["collections"] = probe["collections"]
                 response["database"] = "✅ Connected & Working"
-            except Exception as e:
-                response["database"] = f"⚠️  Connected but Error: {str(e)[:50]}"
+            else:
+                response["database"] = f"⚠️  Connected but Error: {probe['error']}"
         else:
             response["database"] = "⚠️  Available but not initialized"
     except Exception as e:
@@ -245,4 +499,13 @@ def test_database():
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+    # Import string (not the app object) so worker processes can fork.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+    )